@@ -32,6 +32,9 @@ public class SiderCLI {
         public boolean connect() {
             try {
                 socket = new Socket();
+                // Commands are tiny: send them now instead of waiting on Nagle
+                socket.setTcpNoDelay(true);
+                socket.setKeepAlive(true);
                 // 5 second timeout for connection and reads
                 socket.connect(new InetSocketAddress(host, port), 5000);
                 socket.setSoTimeout(5000);
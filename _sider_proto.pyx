@@ -0,0 +1,43 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""
+Optional C implementation of the reply parser in py-driver.py.
+py-driver.py falls back to its pure Python version when this module
+isn't built. To build it next to the driver:
+
+    pip install cython
+    cythonize -i _sider_proto.pyx
+"""
+from cpython.unicode cimport PyUnicode_DecodeUTF8
+
+# Reply frame: [u8 op][u8 status][u32 vlen][value], big-endian
+cdef enum:
+    HEADER_SIZE = 6
+    STATUS_NIL = 1
+
+
+def parse_replies(const unsigned char[:] buf, Py_ssize_t pos, Py_ssize_t end, Py_ssize_t limit):
+    """
+    Parses up to `limit` complete reply frames from buf[pos:end]. Returns
+    (replies, new_pos, need), where `need` is how many bytes the next,
+    incomplete frame needs starting at new_pos. Invalid UTF-8 is decoded
+    with surrogateescape, like the Python version.
+    """
+    cdef list replies = []
+    cdef Py_ssize_t count = 0
+    cdef Py_ssize_t size, start
+    while count < limit:
+        if end - pos < HEADER_SIZE:
+            return replies, pos, HEADER_SIZE
+        size = ((<Py_ssize_t>buf[pos + 2] << 24) | (<Py_ssize_t>buf[pos + 3] << 16)
+                | (<Py_ssize_t>buf[pos + 4] << 8) | <Py_ssize_t>buf[pos + 5])
+        if end - pos - HEADER_SIZE < size:
+            return replies, pos, HEADER_SIZE + size
+
+        start = pos + HEADER_SIZE
+        pos = start + size
+        if buf[start - HEADER_SIZE + 1] == STATUS_NIL:
+            replies.append("(nil)")
+        else:
+            replies.append(PyUnicode_DecodeUTF8(<const char *>&buf[start], size, "surrogateescape"))
+        count += 1
+    return replies, pos, HEADER_SIZE
@@ -33,6 +33,20 @@ const (
 	BloomFilterSize = 1024
 )
 
+// Binary protocol. A frame starting with one of these opcodes is
+// [u8 op][u32 klen][key], followed by [u32 vlen][value] for OpPut.
+// Replies are [u8 op][u8 status][u32 vlen][value]. All integers are
+// big-endian. Any other first byte is parsed as a text command line.
+const (
+	OpPut        = byte(1)
+	OpGet        = byte(2)
+	OpDel        = byte(3)
+	OpCompact    = byte(4)
+	StatusOK     = byte(0)
+	StatusNil    = byte(1)
+	MaxFrameSize = 64 << 20
+)
+
 // ==========================================
 // MEMTABLE (SKIP LIST IMPLEMENTATION)
 // ==========================================
@@ -384,20 +398,89 @@ func (e *Engine) Put(key, value string) {
 }
 
 func (e *Engine) Get(key string) string {
+	if v, found := e.Lookup(key); found {
+		return v
+	}
+	return "(nil)"
+}
+
+func (e *Engine) Lookup(key string) (string, bool) {
 	e.mu.RLock()
 	defer e.mu.RUnlock()
 	// MemTable
 	if v, found, k := e.MemTable.Get(key); found {
 		if k == CmdDel {
-			return "(nil)"
+			return "", false
 		}
-		return v
+		return v, true
 	}
 	// SSTables
 	if v, found, k := SearchSSTables(key); found && k == CmdPut {
-		return v
+		return v, true
 	}
-	return "(nil)"
+	return "", false
+}
+
+func (e *Engine) Delete(key string) {
+	e.mu.Lock()
+	defer e.mu.Unlock()
+	e.Wal.WriteEntry(key, "", CmdDel)
+	e.MemTable.Put(key, "", CmdDel)
+}
+
+func readBlock(r *bufio.Reader) ([]byte, error) {
+	var n uint32
+	if err := binary.Read(r, binary.BigEndian, &n); err != nil {
+		return nil, err
+	}
+	if n > MaxFrameSize {
+		return nil, fmt.Errorf("frame too large: %d bytes", n)
+	}
+	b := make([]byte, n)
+	_, err := io.ReadFull(r, b)
+	return b, err
+}
+
+// Handles one binary frame. Any error desyncs the stream, so the caller
+// drops the connection.
+func handleBinaryFrame(r *bufio.Reader, conn net.Conn, e *Engine) error {
+	op, err := r.ReadByte()
+	if err != nil {
+		return err
+	}
+	key, err := readBlock(r)
+	if err != nil {
+		return err
+	}
+
+	status, val := StatusOK, "OK"
+	switch op {
+	case OpPut:
+		value, err := readBlock(r)
+		if err != nil {
+			return err
+		}
+		e.Put(string(key), string(value))
+	case OpGet:
+		v, found := e.Lookup(string(key))
+		if found {
+			val = v
+		} else {
+			status, val = StatusNil, ""
+		}
+	case OpDel:
+		e.Delete(string(key))
+	case OpCompact:
+		go Compact(e) // Run in background
+		val = "OK Compact Started"
+	}
+
+	reply := make([]byte, 6+len(val))
+	reply[0], reply[1] = op, status
+	binary.BigEndian.PutUint32(reply[2:], uint32(len(val)))
+	copy(reply[6:], val)
+	_, err = conn.Write(reply)
+	return err
 }
 
 func handleConnection(conn net.Conn, e *Engine) {
@@ -405,6 +488,17 @@ func handleConnection(conn net.Conn, e *Engine) {
 	reader := bufio.NewReader(conn)
 
 	for {
+		first, err := reader.Peek(1)
+		if err != nil {
+			break
+		} // Client disconnected
+		if first[0] >= OpPut && first[0] <= OpCompact {
+			if err := handleBinaryFrame(reader, conn, e); err != nil {
+				break
+			}
+			continue
+		}
+
 		// Read command line
 		line, err := reader.ReadString('\n')
 		if err != nil {
@@ -441,10 +535,7 @@ func handleConnection(conn net.Conn, e *Engine) {
 				conn.Write([]byte("ERR Usage: DEL <key>\n"))
 				continue
 			}
-			e.mu.Lock()
-			e.Wal.WriteEntry(parts[1], "", CmdDel)
-			e.MemTable.Put(parts[1], "", CmdDel)
-			e.mu.Unlock()
+			e.Delete(parts[1])
 			conn.Write([]byte("OK\n"))
 
 		case "COMPACT":
@@ -0,0 +1,185 @@
+package main
+
+import (
+	"bufio"
+	"encoding/binary"
+	"errors"
+	"io"
+	"net"
+	"os"
+	"testing"
+	"time"
+)
+
+// The engine keeps its WAL and SSTables relative to the working
+// directory, so the tests (and any Compact they start in the
+// background) run inside a throwaway one.
+var testEngine *Engine
+
+func TestMain(m *testing.M) {
+	dir, err := os.MkdirTemp("", "sider-test-")
+	if err != nil {
+		panic(err)
+	}
+	if err := os.Chdir(dir); err != nil {
+		panic(err)
+	}
+	testEngine = NewEngine()
+	code := m.Run()
+	os.RemoveAll(dir)
+	os.Exit(code)
+}
+
+// ==========================================
+// HELPERS
+// ==========================================
+
+// dial serves one in-memory connection with handleConnection.
+func dial(t *testing.T) (net.Conn, *bufio.Reader) {
+	t.Helper()
+	server, client := net.Pipe()
+	go handleConnection(server, testEngine)
+	t.Cleanup(func() { client.Close() })
+	client.SetDeadline(time.Now().Add(5 * time.Second))
+	return client, bufio.NewReader(client)
+}
+
+// frame encodes [u8 op] followed by a [u32 len][bytes] block per part.
+func frame(op byte, parts ...string) []byte {
+	buf := []byte{op}
+	for _, p := range parts {
+		buf = binary.BigEndian.AppendUint32(buf, uint32(len(p)))
+		buf = append(buf, p...)
+	}
+	return buf
+}
+
+func send(t *testing.T, conn net.Conn, b []byte) {
+	t.Helper()
+	if _, err := conn.Write(b); err != nil {
+		t.Fatalf("write: %v", err)
+	}
+}
+
+func readReply(t *testing.T, r *bufio.Reader) (op, status byte, val string) {
+	t.Helper()
+	header := make([]byte, 6)
+	if _, err := io.ReadFull(r, header); err != nil {
+		t.Fatalf("read reply header: %v", err)
+	}
+	v := make([]byte, binary.BigEndian.Uint32(header[2:]))
+	if _, err := io.ReadFull(r, v); err != nil {
+		t.Fatalf("read reply value: %v", err)
+	}
+	return header[0], header[1], string(v)
+}
+
+func expectReply(t *testing.T, r *bufio.Reader, op, status byte, val string) {
+	t.Helper()
+	gotOp, gotStatus, gotVal := readReply(t, r)
+	if gotOp != op || gotStatus != status || gotVal != val {
+		t.Fatalf("reply = (%d, %d, %q), want (%d, %d, %q)", gotOp, gotStatus, gotVal, op, status, val)
+	}
+}
+
+func expectLine(t *testing.T, r *bufio.Reader, want string) {
+	t.Helper()
+	line, err := r.ReadString('\n')
+	if err != nil {
+		t.Fatalf("read line: %v", err)
+	}
+	if line != want+"\n" {
+		t.Fatalf("line = %q, want %q", line, want+"\n")
+	}
+}
+
+// ==========================================
+// BINARY PROTOCOL
+// ==========================================
+
+func TestBinaryPutGetDel(t *testing.T) {
+	conn, r := dial(t)
+
+	// Values may hold spaces, newlines and non-UTF-8 bytes
+	value := "line one\nline two \xff\x00"
+	send(t, conn, frame(OpPut, "bin:key", value))
+	expectReply(t, r, OpPut, StatusOK, "OK")
+
+	send(t, conn, frame(OpGet, "bin:key"))
+	expectReply(t, r, OpGet, StatusOK, value)
+
+	send(t, conn, frame(OpDel, "bin:key"))
+	expectReply(t, r, OpDel, StatusOK, "OK")
+
+	send(t, conn, frame(OpGet, "bin:key"))
+	expectReply(t, r, OpGet, StatusNil, "")
+}
+
+func TestBinaryGetMissingIsNil(t *testing.T) {
+	conn, r := dial(t)
+	send(t, conn, frame(OpGet, "bin:never-written"))
+	expectReply(t, r, OpGet, StatusNil, "")
+}
+
+func TestBinaryEmptyValueIsNotNil(t *testing.T) {
+	conn, r := dial(t)
+	send(t, conn, frame(OpPut, "bin:empty", ""))
+	expectReply(t, r, OpPut, StatusOK, "OK")
+	send(t, conn, frame(OpGet, "bin:empty"))
+	expectReply(t, r, OpGet, StatusOK, "")
+}
+
+func TestBinaryCompact(t *testing.T) {
+	conn, r := dial(t)
+	send(t, conn, frame(OpCompact, ""))
+	expectReply(t, r, OpCompact, StatusOK, "OK Compact Started")
+}
+
+func TestBinaryPipelinedFrames(t *testing.T) {
+	conn, r := dial(t)
+
+	// Several frames in one write are answered in order
+	var batch []byte
+	batch = append(batch, frame(OpPut, "bin:p1", "a")...)
+	batch = append(batch, frame(OpPut, "bin:p2", "b")...)
+	batch = append(batch, frame(OpGet, "bin:p1")...)
+	batch = append(batch, frame(OpGet, "bin:p2")...)
+	go conn.Write(batch)
+
+	expectReply(t, r, OpPut, StatusOK, "OK")
+	expectReply(t, r, OpPut, StatusOK, "OK")
+	expectReply(t, r, OpGet, StatusOK, "a")
+	expectReply(t, r, OpGet, StatusOK, "b")
+}
+
+func TestTextAndBinaryOnOneConnection(t *testing.T) {
+	conn, r := dial(t)
+
+	send(t, conn, []byte("PUT mixed:text hello world\n"))
+	expectLine(t, r, "OK")
+
+	send(t, conn, frame(OpGet, "mixed:text"))
+	expectReply(t, r, OpGet, StatusOK, "hello world")
+
+	send(t, conn, frame(OpPut, "mixed:bin", "from binary"))
+	expectReply(t, r, OpPut, StatusOK, "OK")
+
+	send(t, conn, []byte("GET mixed:bin\n"))
+	expectLine(t, r, "from binary")
+
+	send(t, conn, []byte("GET mixed:missing\n"))
+	expectLine(t, r, "(nil)")
+}
+
+func TestOversizedFrameClosesConnection(t *testing.T) {
+	conn, r := dial(t)
+
+	header := []byte{OpPut}
+	header = binary.BigEndian.AppendUint32(header, MaxFrameSize+1)
+	send(t, conn, header)
+
+	// The server rejects the length before reading a body and hangs up
+	if _, err := r.ReadByte(); !errors.Is(err, io.EOF) {
+		t.Fatalf("read after oversized frame: err = %v, want EOF", err)
+	}
+}
@@ -1,158 +1,1199 @@
 import socket
 import sys
 import argparse
+import asyncio
+import collections
+import concurrent.futures
+import contextlib
+import errno
+import functools
+import os
+import queue
+import signal
+import struct
+import threading
+import time
+
+try:
+    import liburing
+except ImportError:
+    # Only needed for SiderClient(backend="io_uring")
+    liburing = None
 
 # Configuration
 AZURE_VM_IP = "20.197.19.241"
 
+# Binary protocol (see handleBinaryFrame in main.go). Requests are
+# [u8 op][u32 klen][key], plus [u32 vlen][value] for PUT. Replies are
+# [u8 op][u8 status][u32 vlen][value]. Integers are big-endian.
+OP_PUT = 1
+OP_GET = 2
+OP_DEL = 3
+OP_COMPACT = 4
+STATUS_NIL = 1
+# Largest key or value the server accepts (MaxFrameSize in main.go)
+MAX_FRAME_SIZE = 64 << 20
+REPLY_HEADER = struct.Struct(">BBI")
+
+def _to_bytes(data):
+    """
+    Keys and values may already be bytes; anything else is sent as UTF-8
+    text. Replies that weren't valid UTF-8 come back with surrogate
+    escapes, so they encode back to their original bytes here.
+    """
+    if isinstance(data, (bytes, bytearray)):
+        return data
+    if not isinstance(data, str):
+        data = str(data)
+    return data.encode('utf-8', 'surrogateescape')
+
+def _encode_frame(op, key=b"", value=None):
+    """Builds one request frame from bytes `key` and `value`."""
+    if value is None:
+        return b"".join((struct.pack(">BI", op, len(key)), key))
+    return b"".join((struct.pack(">BI", op, len(key)), key, struct.pack(">I", len(value)), value))
+
+# Hot keys are requested over and over, so their encoded frames (or, for
+# PUT, everything before the value) are cached instead of rebuilt per call.
+# typed=True because 1, 1.0 and True hash alike but encode differently.
+@functools.lru_cache(maxsize=1024, typed=True)
+def _cached_key_frame(op, key):
+    k = _to_bytes(key)
+    if len(k) > MAX_FRAME_SIZE:
+        return "ERR Value too large"
+    return _encode_frame(op, k)
+
+@functools.lru_cache(maxsize=1024, typed=True)
+def _cached_put_prefix(key):
+    k = _to_bytes(key)
+    if len(k) > MAX_FRAME_SIZE:
+        return "ERR Value too large"
+    return _encode_frame(OP_PUT, k)
+
+def _hashable(key):
+    """lru_cache needs hashable arguments, and bytearray isn't one."""
+    return bytes(key) if isinstance(key, bytearray) else key
+
+# The frame builders below return the server's "ERR ..." reply as a string
+# instead of a frame when a key or value is over MAX_FRAME_SIZE: the server
+# would only reset the connection, and the client would retry the upload
+
+def _key_frame(op, key):
+    """Encoded GET/DEL frame for `key`."""
+    return _cached_key_frame(op, _hashable(key))
+
+def _put_prefix(key):
+    """Encoded PUT frame up to, but not including, the value length."""
+    return _cached_put_prefix(_hashable(key))
+
+def _put_frame(key, value):
+    """Encoded PUT frame; `key` and `value` may be str or bytes."""
+    prefix = _put_prefix(key)
+    v = _to_bytes(value)
+    if isinstance(prefix, str) or len(v) > MAX_FRAME_SIZE:
+        return "ERR Value too large"
+    return b"".join((prefix, struct.pack(">I", len(v)), v))
+
+def _frame_from_text(command_str):
+    """
+    Converts a text command ("PUT k v", "GET k", ...) into a request frame,
+    splitting it like the server's text parser does. Malformed commands
+    return the server's "ERR ..." reply as a string instead.
+    """
+    parts = command_str.strip().split(" ", 2)
+    cmd = parts[0].upper()
+    if cmd == "PUT":
+        if len(parts) < 3:
+            return "ERR Usage: PUT <key> <val>"
+        return _put_frame(parts[1], parts[2])
+    if cmd in ("GET", "DEL"):
+        if len(parts) < 2:
+            return f"ERR Usage: {cmd} <key>"
+        return _key_frame(OP_GET if cmd == "GET" else OP_DEL, parts[1])
+    if cmd == "COMPACT":
+        return _encode_frame(OP_COMPACT)
+    return "ERR Unknown Command"
+
+def _parse_replies(buf, pos, end, limit):
+    """
+    Parses up to `limit` complete reply frames from buf[pos:end]. Returns
+    (replies, new_pos, need), where `need` is how many bytes the next,
+    incomplete frame needs starting at new_pos. The header gives each
+    payload's length, so replies are sliced out without scanning.
+
+    Values are binary-safe: bytes that aren't valid UTF-8 are decoded
+    with surrogateescape (recover them with
+    reply.encode('utf-8', 'surrogateescape')) rather than raising.
+    """
+    replies = []
+    view = memoryview(buf)
+    try:
+        while len(replies) < limit:
+            if end - pos < REPLY_HEADER.size:
+                return replies, pos, REPLY_HEADER.size
+            _, status, size = REPLY_HEADER.unpack_from(buf, pos)
+            if end - pos < REPLY_HEADER.size + size:
+                return replies, pos, REPLY_HEADER.size + size
+            start = pos + REPLY_HEADER.size
+            pos = start + size
+            # Decode straight from the buffer, without an interim copy
+            replies.append("(nil)" if status == STATUS_NIL
+                           else str(view[start:pos], 'utf-8', 'surrogateescape'))
+        return replies, pos, REPLY_HEADER.size
+    finally:
+        # Let the caller resize buf again
+        view.release()
+
+# The reply parser runs once per reply, so a compiled version is used when
+# _sider_proto.pyx has been built (see the README)
+try:
+    from _sider_proto import parse_replies
+except ImportError:
+    parse_replies = _parse_replies
+
 class SiderClient:
     """
     A Python driver for the Sider database.
     Handles raw TCP connections and protocol formatting.
+
+    backend="io_uring" routes sends and receives through an io_uring
+    (Linux 6.1+, needs the `liburing` package) instead of plain syscalls.
+    Such a client must only be used from the thread that connected it.
+
+    cpu_affinity=N pins the thread doing the client's I/O to CPU N (Linux
+    only). Pick the CPU that services the NIC queue's interrupts, so
+    replies aren't handed across cores or chiplets; see "CPU Pinning" in
+    the README. Until put_async() is used, that is whichever thread calls
+    connect(), usually the application's own: it stays pinned even after
+    close(). Once put_async() starts the writer and reader threads, those
+    two are pinned instead and reconnects leave the caller alone. A CPU
+    the constructing thread can't run on raises ValueError up front.
     """
-    def __init__(self, host='localhost', port=4000, auto_connect=True):
+    BACKENDS = ("socket", "io_uring")
+    BUFFER_SIZE = 64 * 1024
+    # Most buffers the kernel accepts in one sendmsg() (Linux UIO_MAXIOV)
+    IOV_MAX = 1024
+    # Attempts per request when the connection turns out to be stale
+    RETRIES = 3
+    # Most queued put_async() commands the writer thread sends per sendmsg()
+    BATCH_SIZE = 64
+
+    def __init__(self, host='localhost', port=4000, auto_connect=True, backend="socket", cpu_affinity=None):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown backend: {backend!r}")
+        if backend == "io_uring" and liburing is None:
+            raise ImportError("backend='io_uring' requires the 'liburing' package")
+        # Checked once here, so a bad CPU can't surface later as a failed
+        # connect or a lost connection
+        if cpu_affinity is not None and cpu_affinity not in os.sched_getaffinity(0):
+            raise ValueError(f"cpu_affinity={cpu_affinity} is not a CPU this thread may run on")
         self.host = host
         self.port = port
+        self.backend = backend
+        self.cpu_affinity = cpu_affinity
         self.sock = None
+        # Whatever moves the bytes: the socket itself, or a _UringIO
+        self._io = None
+        # Reused for the client's lifetime so replies don't allocate a
+        # buffer per read: they land in _rbuf[_head:_tail] until consumed
+        self._rbuf = bytearray(self.BUFFER_SIZE)
+        self._head = self._tail = 0
+        # put_async() state: (frame, future) pairs waiting for the writer
+        # thread, and (send time, future) pairs of sent commands, in reply
+        # order. Both threads start on the first put_async().
+        self._q = collections.deque()
+        self._waiting = collections.deque()
+        self._wake = threading.Event()
+        self._send_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._writer = self._reader = None
+        self._closing = False
         if auto_connect:
             self.connect()
 
+    def _new_socket(self):
+        # Create a TCP/IP socket
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        # Commands are tiny: send them now instead of waiting on Nagle
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        if hasattr(socket, "TCP_QUICKACK"):
+            # Linux only: ACK replies immediately instead of delaying
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
+        # Set a timeout so the client doesn't hang forever if server dies
+        sock.settimeout(5.0)
+        return sock
+
     def connect(self):
         """Establishes a raw TCP connection to Sider."""
+        if self._writer is None:
+            # pid 0 is the calling thread
+            self._pin(0)
         try:
-            # Create a TCP/IP socket
-            self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            # Set a timeout so the client doesn't hang forever if server dies
-            self.sock.settimeout(5.0) 
+            self.sock = self._new_socket()
             self.sock.connect((self.host, self.port))
-            return True
         except (socket.error, socket.timeout) as e:
-            self.sock = None
+            self._disconnect()
             return False
 
+        # Outside the try above: a backend that can't start is a setup
+        # error, not a network failure, and must not be retried as one
+        try:
+            self._io = _UringIO(self.sock) if self.backend == "io_uring" else self.sock
+        except BaseException:
+            self._disconnect()
+            raise
+        # Leftovers from a previous connection would desync replies
+        self._head = self._tail = 0
+        return True
+
+    def _pin(self, tid):
+        if self.cpu_affinity is not None:
+            os.sched_setaffinity(tid, {self.cpu_affinity})
+
+    def _disconnect(self):
+        if self._io is not None and self._io is not self.sock:
+            self._io.close()
+        if self.sock:
+            self.sock.close()
+        self.sock = None
+        self._io = None
+
     def is_connected(self):
         return self.sock is not None
 
     def _send_command(self, command_str):
         """Encodes and sends a raw text command, returns the response."""
-        if not self.sock:
-            # Try to reconnect once
+        return self.execute_pipeline([command_str])[0]
+
+    def execute_pipeline(self, commands):
+        """
+        Sends a batch of raw text commands in a single write and returns
+        their responses, in order. N commands cost one round trip.
+        """
+        return self._execute([_frame_from_text(cmd) for cmd in commands])
+
+    def _execute(self, frames):
+        """
+        Sends encoded request frames in one write; returns their replies.
+        Frames rejected while encoding are "ERR ..." strings already and
+        are answered without a round trip.
+        """
+        if not frames:
+            return []
+        if not all(isinstance(f, bytes) for f in frames):
+            replies = iter(self._execute([f for f in frames if isinstance(f, bytes)]))
+            return [next(replies) if isinstance(f, bytes) else f for f in frames]
+        if self._writer is not None:
+            return self._submit(frames)
+
+        for attempt in range(self.RETRIES):
+            if attempt:
+                # Back off before redialing a flapping server: 10ms, 20ms, ...
+                time.sleep(0.01 * 2 ** (attempt - 1))
+            try:
+                if self.sock:
+                    self._send_frames(frames)
+                elif not self._reconnect_and_send(frames):
+                    return ["Error: Not connected to server."] * len(frames)
+                return self._read_responses(len(frames))
+            except socket.timeout:
+                # The late replies would otherwise be read as the answers
+                # to the next request
+                self._disconnect()
+                return ["Error: Request timed out."] * len(frames)
+            except (BrokenPipeError, ConnectionResetError) as e:
+                # Stale connection: redial and replay the batch. This is
+                # at-least-once: the server may already have applied some
+                # of it, and a replayed PUT can overwrite another client's
+                # later write. COMPACT is never replayed, since a second
+                # run would race the first over the same .db file.
+                self._disconnect()
+                error = f"Error: Connection lost ({e})"
+                if any(frame[0] == OP_COMPACT for frame in frames):
+                    return [error] * len(frames)
+            except socket.error as e:
+                self._disconnect()
+                return [f"Error: Connection lost ({e})"] * len(frames)
+        return [error] * len(frames)
+
+    def _read_responses(self, count):
+        """Reads `count` replies, in order."""
+        responses = []
+        while True:
+            replies, self._head, need = parse_replies(
+                self._rbuf, self._head, self._tail, count - len(responses))
+            responses.extend(replies)
+            if self._head == self._tail:
+                self._head = self._tail = 0
+            if len(responses) == count:
+                return responses
+            if not self._fill(need):
+                # Empty read means server closed connection
+                raise ConnectionResetError("Server closed connection.")
+
+    def _send_frames(self, frames):
+        if self._io is self.sock and hasattr(self.sock, "sendmsg"):
+            self._sendmsg_all(frames)
+        else:
+            # io_uring (or a platform without sendmsg) takes one joined
+            # buffer; _UringIO keeps it alive until the kernel has sent it
+            self._io.sendall(b"".join(frames))
+
+    def _reconnect_and_send(self, frames):
+        """Redials and sends `frames`; False if the server can't be reached."""
+        if self.backend != "io_uring":
             if not self.connect():
-                return "Error: Not connected to server."
-        
+                return False
+            self._send_frames(frames)
+            return True
+
+        # io_uring: connect, send and the first receive go to the kernel as
+        # one linked SQE chain, so a reconnect costs a single submit. Like
+        # connect(), it runs on (and pins) the calling thread.
+        self._pin(0)
+        self.sock = self._new_socket()
         try:
-            # Protocol: Command must end with newline
-            msg = (command_str + "\n").encode('utf-8')
-            self.sock.sendall(msg)
-            
-            # Read response. In a real driver, we'd buffer until we see a newline.
-            # For this simple protocol, 4096 bytes is usually enough for a value.
-            response = self.sock.recv(4096).decode('utf-8').strip()
-            if not response:
-                # Empty string usually means server closed connection
-                self.sock.close()
-                self.sock = None
-                return "Error: Server closed connection."
-                
-            return response
-        except socket.timeout:
-            return "Error: Request timed out."
-        except socket.error as e:
-            self.sock.close()
-            self.sock = None
-            return f"Error: Connection lost ({e})"
+            self._io = _UringIO(self.sock)
+        except BaseException:
+            self._disconnect()
+            raise
+        self._head = self._tail = 0
+        try:
+            host = socket.getaddrinfo(self.host, self.port, socket.AF_INET, socket.SOCK_STREAM)[0][4][0]
+            addr = liburing.Sockaddr(liburing.AF_INET, host, self.port)
+            if self._io.connect_and_send(addr, b"".join(frames)):
+                return True
+        except (socket.gaierror, socket.timeout):
+            pass
+        self._disconnect()
+        return False
+
+    def _sendmsg_all(self, frames):
+        """
+        Writes frames with scatter-gather sendmsg(), so a batch goes out in
+        one syscall without being concatenated first. Resumes after
+        partial sends.
+        """
+        views = [memoryview(frame) for frame in frames]
+        i = 0
+        while i < len(views):
+            sent = self.sock.sendmsg(views[i:i + self.IOV_MAX])
+            # Skip fully sent buffers, trim the one cut short
+            while i < len(views) and sent >= len(views[i]):
+                sent -= len(views[i])
+                i += 1
+            if sent:
+                views[i] = views[i][sent:]
+
+    def _fill(self, size):
+        """Receives until `size` unconsumed bytes are buffered; False on EOF."""
+        while self._tail - self._head < size:
+            if self._head + size > len(self._rbuf):
+                self._make_room(size)
+            n = self._io.recv_into(memoryview(self._rbuf)[self._tail:])
+            if not n:
+                return False
+            self._tail += n
+        return True
+
+    def _make_room(self, size):
+        """Moves unconsumed bytes to the front of _rbuf, growing it to fit `size`."""
+        pending = self._tail - self._head
+        if size > len(self._rbuf):
+            grown = bytearray(max(size, 2 * len(self._rbuf)))
+            grown[:pending] = self._rbuf[self._head:self._tail]
+            self._rbuf = grown
+        else:
+            self._rbuf[:pending] = self._rbuf[self._head:self._tail]
+        self._head = 0
+        self._tail = pending
+
+    def pipeline(self):
+        """Returns a SiderPipeline that queues commands until execute()."""
+        return SiderPipeline(self)
 
     def put(self, key, value):
-        return self._send_command(f"PUT {key} {value}")
+        return self._execute([_put_frame(key, value)])[0]
+
+    def put_file(self, key, path):
+        """
+        Stores the contents of the file at `path` under `key`. The file is
+        handed to the socket with sendfile(), so the kernel copies it
+        straight from the page cache and it never passes through Python.
+        """
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size > MAX_FRAME_SIZE or isinstance(_put_prefix(key), str):
+                return "ERR Value too large"
+            if self._writer is not None:
+                return self._submit_file(key, f, size)
+            if not self.sock and not self.connect():
+                return "Error: Not connected to server."
+
+            try:
+                if not self._send_file(key, f, size):
+                    # File shrank while sending; the frame is now corrupt
+                    self._disconnect()
+                    return "Error: File changed while sending."
+                return self._read_responses(1)[0]
+            except socket.timeout:
+                self._disconnect()
+                return "Error: Request timed out."
+            except socket.error as e:
+                self._disconnect()
+                return f"Error: Connection lost ({e})"
+
+    def _send_file(self, key, f, size):
+        """Sends a PUT frame whose value is `size` bytes of `f`; False if the file shrank."""
+        header = b"".join((_put_prefix(key), struct.pack(">I", size)))
+        # MSG_MORE (Linux) holds the header back to share a segment with
+        # the start of the file
+        self.sock.sendall(header, getattr(socket, "MSG_MORE", 0))
+        return self.sock.sendfile(f, 0, size) == size
 
     def get(self, key):
-        return self._send_command(f"GET {key}")
+        return self._execute([_key_frame(OP_GET, key)])[0]
 
     def delete(self, key):
-        return self._send_command(f"DEL {key}")
+        return self._execute([_key_frame(OP_DEL, key)])[0]
     
     def compact(self):
-        return self._send_command("COMPACT")
+        return self._execute([_encode_frame(OP_COMPACT)])[0]
 
-    def close(self):
+    def put_async(self, key, value):
+        """
+        Queues a PUT and returns at once with a concurrent.futures.Future
+        for its reply. A writer thread sends queued commands in batches of
+        up to BATCH_SIZE, one sendmsg() each, and a reader thread resolves
+        the futures as replies arrive. Other calls on this client are
+        sent after everything already queued, so replies keep call order.
+        """
+        future = concurrent.futures.Future()
+        frame = _put_frame(key, value)
+        if isinstance(frame, str):
+            future.set_result(frame)
+            return future
+        if self._writer is None:
+            with self._start_lock:
+                # Two first callers must not start two readers on one socket
+                if self._writer is None:
+                    self._start_background()
+        self._q.append((frame, future))
+        self._wake.set()
+        return future
+
+    def _start_background(self):
+        if self.backend != "socket":
+            raise ValueError("put_async() requires backend='socket'")
+        self._closing = False
+        self._writer = threading.Thread(target=self._drain, name="sider-writer", daemon=True)
+        self._writer.start()
+        try:
+            # Pinned from here, by thread id, so a bad CPU raises in the caller
+            self._pin(self._writer.native_id)
+        except OSError:
+            self._closing = True
+            self._wake.set()
+            self._writer.join()
+            self._writer = None
+            raise
         if self.sock:
-            self.sock.close()
+            self._start_reader()
+
+    def _start_reader(self):
+        self._reader = threading.Thread(target=self._read_loop, name="sider-reader", daemon=True)
+        self._reader.start()
+        # The reader is what receives replies near the NIC interrupt
+        self._pin(self._reader.native_id)
+
+    def _drain(self):
+        """Writer thread: sends queued commands until close()."""
+        while True:
+            self._wake.clear()
+            with self._send_lock:
+                batch = self._pop_batch()
+                if batch:
+                    self._send_batch(batch)
+            if not batch:
+                if self._closing:
+                    return
+                self._wake.wait()
+
+    def _pop_batch(self):
+        batch = []
+        while self._q and len(batch) < self.BATCH_SIZE:
+            batch.append(self._q.popleft())
+        return batch
+
+    def _send_batch(self, batch):
+        """Sends (frame, future) pairs; the caller holds _send_lock."""
+        if not self.sock:
+            if not self.connect():
+                for _, future in batch:
+                    future.set_result("Error: Not connected to server.")
+                return
+            self._start_reader()
+        # Registered before sending, so the reader always has a future
+        # for each reply it parses
+        sent_at = time.monotonic()
+        self._waiting.extend((sent_at, future) for _, future in batch)
+        try:
+            self._sendmsg_all([frame for frame, _ in batch])
+        except socket.error:
+            # Wakes the reader, which fails every outstanding future
+            self._shutdown(socket.SHUT_RDWR)
+
+    def _submit(self, frames):
+        """Sends frames behind any queued commands and waits for their replies."""
+        batch = [(frame, concurrent.futures.Future()) for frame in frames]
+        with self._send_lock:
+            while self._q:
+                self._send_batch(self._pop_batch())
+            self._send_batch(batch)
+        return [future.result() for _, future in batch]
+
+    def _submit_file(self, key, f, size):
+        """put_file() for a client with put_async() running."""
+        future = concurrent.futures.Future()
+        with self._send_lock:
+            while self._q:
+                self._send_batch(self._pop_batch())
+            if not self.sock:
+                if not self.connect():
+                    return "Error: Not connected to server."
+                self._start_reader()
+            self._waiting.append((time.monotonic(), future))
+            try:
+                if not self._send_file(key, f, size):
+                    self._shutdown(socket.SHUT_RDWR)
+                    return "Error: File changed while sending."
+            except socket.error:
+                self._shutdown(socket.SHUT_RDWR)
+        return future.result()
+
+    def _read_loop(self):
+        """Reader thread: resolves the futures of sent commands, in order."""
+        timeout = self.sock.gettimeout()
+        error = None
+        while error is None:
+            try:
+                replies, self._head, need = parse_replies(
+                    self._rbuf, self._head, self._tail, sys.maxsize)
+                for reply in replies:
+                    self._waiting.popleft()[1].set_result(reply)
+                if self._head == self._tail:
+                    self._head = self._tail = 0
+                if not self._fill(need):
+                    # Empty read means server closed connection
+                    raise ConnectionResetError("Server closed connection.")
+            except socket.timeout:
+                # recv() timed out on an idle wait, which may have started
+                # long before the oldest request was sent: only time out
+                # once that request has itself waited `timeout` seconds
+                if self._closing:
+                    error = "Error: Request timed out."
+                elif self._waiting and time.monotonic() - self._waiting[0][0] >= timeout:
+                    error = "Error: Request timed out."
+            except Exception as e:
+                # Socket errors, but also anything unexpected: a reader that
+                # died quietly would leave every caller waiting forever
+                error = f"Error: Connection lost ({e})"
+
+        # The connection is done for: fail what it still owes. The writer
+        # redials on its next batch.
+        with self._send_lock:
+            while self._waiting:
+                self._waiting.popleft()[1].set_result(error)
+            self._disconnect()
+
+    def _shutdown(self, how):
+        try:
+            self.sock.shutdown(how)
+        except OSError:
+            pass
+
+    def close(self):
+        with self._start_lock:
+            if self._writer is not None:
+                # Let the writer send what's queued, then half-close so the
+                # server hangs up once the reader has collected every reply
+                self._closing = True
+                self._wake.set()
+                self._writer.join()
+                with self._send_lock:
+                    if self.sock:
+                        self._shutdown(socket.SHUT_WR)
+                if self._reader is not None:
+                    self._reader.join()
+                self._writer = self._reader = None
+        self._disconnect()
+
+
+class _UringIO:
+    """
+    Socket-like sendall()/recv_into() for a socket, driven through an
+    io_uring. The fd is registered with the ring so SQEs use
+    IOSQE_FIXED_FILE, and a receive is kept armed alongside each send so
+    both go to the kernel in a single io_uring_submit().
+    """
+    ENTRIES = 64
+    # SQE user_data tags
+    SEND = 1
+    RECV = 2
+    CONNECT = 3
+    # Index of the socket in the registered file table
+    FD = 0
+
+    def __init__(self, sock):
+        self.ring = liburing.Ring()
+        self.cqe = liburing.Cqe()
+        # Setup failures (e.g. EINVAL from a pre-6.1 kernel without
+        # DEFER_TASKRUN) are raised as RuntimeError, so the client's
+        # socket-error handling doesn't mistake them for a lost connection
+        try:
+            liburing.io_uring_queue_init(
+                self.ENTRIES, self.ring,
+                liburing.IORING_SETUP_SINGLE_ISSUER | liburing.IORING_SETUP_DEFER_TASKRUN,
+            )
+        except OSError as e:
+            raise RuntimeError(f"io_uring setup failed: {e}") from e
+        try:
+            liburing.io_uring_register_files(self.ring, liburing.FileIndex([sock.fileno()]))
+        except OSError as e:
+            liburing.io_uring_queue_exit(self.ring)
+            raise RuntimeError(f"io_uring setup failed: {e}") from e
+        self.timeout = liburing.timespec(sock.gettimeout() or 5.0)
+        self._recv_buf = bytearray(65536)
+        self._recv_armed = False
+        # Received bytes recv_into() hasn't handed out yet
+        self._unread = memoryview(self._recv_buf)[:0]
+        # Completed but not yet consumed results, keyed by tag
+        self._results = {}
+        # Payload of the send in flight (see sendall())
+        self._sending = b""
+
+    def sendall(self, payload):
+        # The bindings only take whole bytes objects, not views, and don't
+        # keep a reference to them: _sending holds the buffer until the
+        # kernel is done with it, or the buffer could be freed and reused
+        # under an in-flight send
+        self._sending = bytes(payload)
+        while self._sending:
+            sqe = liburing.io_uring_get_sqe(self.ring)
+            liburing.io_uring_prep_send(sqe, self.FD, self._sending)
+            sqe.flags |= liburing.IOSQE_FIXED_FILE
+            sqe.user_data = self.SEND
+            self._arm_recv()
+            liburing.io_uring_submit(self.ring)
+            sent = self._reap(self.SEND)
+            self._sending = self._sending[sent:]
+
+    def connect_and_send(self, addr, payload):
+        """
+        Connects the not yet connected socket, sends `payload` and arms the
+        first receive as one IOSQE_IO_LINK chain: a single submit, and the
+        kernel runs them in order. Returns False if the connect failed.
+        """
+        link = liburing.IOSQE_FIXED_FILE | liburing.IOSQE_IO_LINK
+        sqe = liburing.io_uring_get_sqe(self.ring)
+        liburing.io_uring_prep_connect(sqe, self.FD, addr)
+        sqe.flags |= link
+        sqe.user_data = self.CONNECT
+        sqe = liburing.io_uring_get_sqe(self.ring)
+        # Held until the SEND completes, even if cancelled (see sendall())
+        self._sending = bytes(payload)
+        liburing.io_uring_prep_send(sqe, self.FD, self._sending)
+        sqe.flags |= link
+        sqe.user_data = self.SEND
+        self._arm_recv()
+        liburing.io_uring_submit(self.ring)
+
+        if self._wait(self.CONNECT) < 0:
+            # The rest of the chain completes with -ECANCELED
+            self._wait(self.SEND)
+            self._sending = b""
+            self._wait(self.RECV)
+            return False
+        sent = self._reap(self.SEND)
+        if sent < len(self._sending):
+            # A short send breaks the chain, which may cancel the receive
+            res = self._wait(self.RECV)
+            if res != -errno.ECANCELED:
+                self._results[self.RECV] = res
+            self.sendall(self._sending[sent:])
+        self._sending = b""
+        return True
+
+    def recv_into(self, view):
+        if not self._unread:
+            self._arm_recv()
+            liburing.io_uring_submit(self.ring)
+            n = self._reap(self.RECV)
+            self._unread = memoryview(self._recv_buf)[:n]
+        n = min(len(view), len(self._unread))
+        view[:n] = self._unread[:n]
+        self._unread = self._unread[n:]
+        return n
+
+    def _arm_recv(self):
+        # A completed receive owns _recv_buf until recv_into() drains it
+        if self._recv_armed or self.RECV in self._results or self._unread:
+            return
+        sqe = liburing.io_uring_get_sqe(self.ring)
+        liburing.io_uring_prep_recv(sqe, self.FD, self._recv_buf)
+        sqe.flags |= liburing.IOSQE_FIXED_FILE
+        sqe.user_data = self.RECV
+        self._recv_armed = True
+
+    def _wait(self, tag):
+        """Waits for the completion tagged `tag`; returns its raw result."""
+        while tag not in self._results:
+            try:
+                liburing.io_uring_wait_cqe_timeout(self.ring, self.cqe, self.timeout)
+            except OSError as e:
+                if e.errno == errno.ETIME:
+                    raise socket.timeout("timed out")
+                raise
+            cqe = self.cqe[0]
+            try:
+                res = cqe.res
+            except OSError as e:
+                # The bindings raise instead of returning a negative result
+                res = -e.errno
+            self._results[cqe.user_data] = res
+            if cqe.user_data == self.RECV:
+                self._recv_armed = False
+            liburing.io_uring_cqe_seen(self.ring, cqe)
+        return self._results.pop(tag)
+
+    def _reap(self, tag):
+        """Like _wait(), but raises OSError for a failed operation."""
+        res = self._wait(tag)
+        if res < 0:
+            raise OSError(-res, os.strerror(-res))
+        return res
+
+    def close(self):
+        # Also drops the ring's reference to the registered socket, and
+        # cancels anything still in flight, so _sending can go
+        liburing.io_uring_queue_exit(self.ring)
+        self._sending = b""
+
+class SiderPipeline:
+    """
+    Queues commands client-side and flushes them in one round trip.
+
+        with client.pipeline() as p:
+            p.put("a", "1").get("a")
+        print(p.results)
+    """
+    def __init__(self, client):
+        self.client = client
+        self.frames = []
+        self.results = []
+
+    def put(self, key, value):
+        self.frames.append(_put_frame(key, value))
+        return self
+
+    def get(self, key):
+        self.frames.append(_key_frame(OP_GET, key))
+        return self
+
+    def delete(self, key):
+        self.frames.append(_key_frame(OP_DEL, key))
+        return self
+
+    def compact(self):
+        self.frames.append(_encode_frame(OP_COMPACT))
+        return self
+
+    def execute(self):
+        frames, self.frames = self.frames, []
+        self.results = self.client._execute(frames)
+        return self.results
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.execute()
+
+class SiderConnectionPool:
+    """
+    A bounded pool of SiderClient connections for multi-threaded callers.
+    Connections are opened lazily up to `max_size` and reused afterwards,
+    so concurrent requests don't pay a TCP handshake each.
+
+        pool = SiderConnectionPool(host, port, max_size=8)
+        with pool.acquire() as client:
+            client.get("user:100")
+    """
+    def __init__(self, host='localhost', port=4000, max_size=8, timeout=None):
+        self.host = host
+        self.port = port
+        self.max_size = max_size
+        # How long acquire() waits for a free connection (None = forever)
+        self.timeout = timeout
+        self._idle = queue.Queue(maxsize=max_size)
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def acquire(self):
+        """Lends a client to the caller; raises queue.Empty on timeout."""
+        client = self._checkout()
+        try:
+            yield client
+        finally:
+            self._release(client)
+
+    def _checkout(self):
+        # Each of the `_created` slots is either lent out or sitting in
+        # _idle, as a client or as None (a slot whose connection broke)
+        try:
+            client = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                grow = self._created < self.max_size
+                if grow:
+                    self._created += 1
+            client = None if grow else self._idle.get(timeout=self.timeout)
+
+        if client is None:
+            try:
+                client = SiderClient(self.host, self.port)
+            except BaseException:
+                # Hand the slot on rather than leak it
+                self._idle.put_nowait(None)
+                raise
+        return client
+
+    def _release(self, client):
+        if not client.is_connected():
+            # Broken socket: drop it, but keep the slot, so a thread
+            # waiting in acquire() wakes up and opens a fresh connection
+            client.close()
+            client = None
+        self._idle.put_nowait(client)
+
+    def close(self):
+        """Closes every idle connection in the pool."""
+        while True:
+            try:
+                client = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if client is not None:
+                client.close()
+            with self._lock:
+                self._created -= 1
+
+class _ReplyProtocol(asyncio.BufferedProtocol):
+    """
+    Receives replies for AsyncSiderClient straight into one preallocated
+    buffer (the event loop recv_into()s it) and hands each complete frame
+    to `on_reply`, so no per-read bytes objects are created. Both callbacks
+    get the protocol as their first argument, so the client can tell a
+    stale connection's callbacks from the live one's.
+    """
+    def __init__(self, on_reply, on_lost):
+        self._on_reply = on_reply
+        self._on_lost = on_lost
+        self._buf = bytearray(SiderClient.BUFFER_SIZE)
+        self._head = self._tail = 0
+        # Bytes the frame at _head needs in total, once its header is known
+        self._need = REPLY_HEADER.size
+        self._writable = None
+        self.closed = asyncio.get_running_loop().create_future()
+
+    def get_buffer(self, sizehint):
+        if self._head + self._need > len(self._buf) or self._tail == len(self._buf):
+            # The loop may still hold the previous view, so never resize
+            # _buf in place: shift with a same-length copy or swap buffers
+            pending = self._tail - self._head
+            if self._need > len(self._buf):
+                grown = bytearray(max(self._need, 2 * len(self._buf)))
+                grown[:pending] = self._buf[self._head:self._tail]
+                self._buf = grown
+            else:
+                self._buf[:pending] = self._buf[self._head:self._tail]
+            self._head, self._tail = 0, pending
+        return memoryview(self._buf)[self._tail:]
+
+    def buffer_updated(self, nbytes):
+        self._tail += nbytes
+        replies, self._head, self._need = parse_replies(
+            self._buf, self._head, self._tail, sys.maxsize)
+        for reply in replies:
+            self._on_reply(self, reply)
+        if self._head == self._tail:
+            self._head = self._tail = 0
+
+    def pause_writing(self):
+        self._writable = asyncio.get_running_loop().create_future()
+
+    def resume_writing(self):
+        if self._writable and not self._writable.done():
+            self._writable.set_result(None)
+        self._writable = None
+
+    async def drain(self):
+        """Waits while the transport's write buffer is over its high-water mark."""
+        if self._writable:
+            await self._writable
+
+    def connection_lost(self, exc):
+        self.resume_writing()
+        self._on_lost(self, exc)
+        self.closed.set_result(None)
+
+
+class AsyncSiderClient:
+    """
+    An asyncio driver for Sider. Any number of coroutines can share one
+    connection: requests are pipelined onto the socket and, since the
+    server answers in order, replies are matched to callers through a
+    FIFO of futures.
+    """
+    def __init__(self, host='localhost', port=4000):
+        self.host = host
+        self.port = port
+        self.transport = None
+        self.protocol = None
+        self._pending = collections.deque()
+        # Makes concurrent first requests share one connect()
+        self._connect_lock = asyncio.Lock()
+
+    async def connect(self):
+        """Opens the connection; replies are read by a _ReplyProtocol."""
+        loop = asyncio.get_running_loop()
+        try:
+            self.transport, self.protocol = await asyncio.wait_for(
+                loop.create_connection(
+                    lambda: _ReplyProtocol(self._on_reply, self._on_lost),
+                    self.host, self.port,
+                ),
+                timeout=5.0,
+            )
+        except (OSError, asyncio.TimeoutError):
+            self.transport = self.protocol = None
+            return False
+
+        # asyncio already disables Nagle on TCP transports
+        sock = self.transport.get_extra_info("socket")
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        self.transport.set_write_buffer_limits(high=256 * 1024)
+        return True
+
+    def is_connected(self):
+        return self.transport is not None
+
+    async def _send_command(self, command_str):
+        return (await self.execute_pipeline([command_str]))[0]
+
+    async def execute_pipeline(self, commands):
+        """Writes a batch of text commands at once and awaits all their replies."""
+        return await self._execute([_frame_from_text(cmd) for cmd in commands])
+
+    async def _execute(self, frames):
+        if not frames:
+            return []
+        if not all(isinstance(f, bytes) for f in frames):
+            # "ERR ..." strings from encoding are answered locally
+            replies = iter(await self._execute([f for f in frames if isinstance(f, bytes)]))
+            return [next(replies) if isinstance(f, bytes) else f for f in frames]
+
+        if not self.transport:
+            async with self._connect_lock:
+                # Whoever held the lock may have connected already;
+                # otherwise try to reconnect once
+                if not self.transport and not await self.connect():
+                    return ["Error: Not connected to server."] * len(frames)
+
+        loop = asyncio.get_running_loop()
+        futures = [loop.create_future() for _ in frames]
+        self._pending.extend(futures)
+        self.transport.write(b"".join(frames))
+        await self.protocol.drain()
+
+        # shield() keeps a timed-out future queued, so later replies still
+        # line up with the requests that caused them
+        try:
+            return await asyncio.wait_for(
+                asyncio.shield(asyncio.gather(*futures)), timeout=5.0
+            )
+        except asyncio.TimeoutError:
+            return ["Error: Request timed out."] * len(frames)
+
+    def _on_reply(self, protocol, reply):
+        if protocol is not self.protocol:
+            return
+        fut = self._pending.popleft()
+        if not fut.done():
+            fut.set_result(reply)
+
+    def _on_lost(self, protocol, exc):
+        if protocol is not self.protocol:
+            # An old connection going away must not fail the live one's
+            # requests or close its transport
+            return
+        if exc is None:
+            self._drop_connection("Error: Server closed connection.")
+        else:
+            self._drop_connection(f"Error: Connection lost ({exc})")
+
+    def _drop_connection(self, error):
+        # Every request still in flight gets the error as its reply
+        while self._pending:
+            fut = self._pending.popleft()
+            if not fut.done():
+                fut.set_result(error)
+        if self.transport:
+            self.transport.close()
+        self.transport = self.protocol = None
+
+    async def put(self, key, value):
+        return (await self._execute([_put_frame(key, value)]))[0]
+
+    async def get(self, key):
+        return (await self._execute([_key_frame(OP_GET, key)]))[0]
+
+    async def delete(self, key):
+        return (await self._execute([_key_frame(OP_DEL, key)]))[0]
+
+    async def compact(self):
+        return (await self._execute([_encode_frame(OP_COMPACT)]))[0]
+
+    async def close(self):
+        if self.transport:
+            protocol = self.protocol
+            self._drop_connection("Error: Client closed connection.")
+            await protocol.closed
 
 # ==========================================
 # INTERACTIVE CLI
 # ==========================================
 
-def run_cli(host, port):
+HELP_LINES = [
+    "  PUT <key> <value>  : Save data",
+    "  GET <key>          : Read data",
+    "  DEL <key>          : Delete data",
+    "  COMPACT            : Trigger disk compaction",
+    "  CONNECT <host>     : Switch server",
+    "  EXIT               : Quit",
+]
+
+def write_lines(lines):
+    """Writes a block of lines with one write and one flush, instead of a print() each."""
+    sys.stdout.write("\n".join(lines) + "\n")
+    sys.stdout.flush()
+
+# Command handlers take (client, parts, user_input) and return the client
+# to keep using, or None to leave the shell
+
+async def _handle_exit(client, parts, user_input):
+    print("Bye!")
+    return None
+
+async def _handle_connect(client, parts, user_input):
+    # Feature to switch servers inside the CLI
+    if len(parts) < 2:
+        print("Usage: CONNECT <host> [port]")
+        return client
+    new_host = parts[1]
+    new_port = int(parts[2]) if len(parts) > 2 else 4000
+    await client.close()
+    client = AsyncSiderClient(new_host, new_port)
+    if await client.connect():
+        print(f"✅ Switched to {new_host}:{new_port}")
+    else:
+        print(f"❌ Could not reach {new_host}:{new_port}")
+    return client
+
+async def _handle_passthrough(client, parts, user_input):
+    # Pass raw command string directly to the helper
+    # This handles the logic for us
+    resp = await client._send_command(user_input)
+
+    # Pretty print errors
+    if resp.startswith("Error"):
+        print(f"⚠️  {resp}")
+    else:
+        print(resp)
+    return client
+
+async def _handle_help(client, parts, user_input):
+    write_lines(HELP_LINES)
+    return client
+
+async def _handle_unknown(client, parts, user_input):
+    print(f"Unknown command: {parts[0].upper()}")
+    return client
+
+HANDLERS = {
+    "EXIT": _handle_exit,
+    "QUIT": _handle_exit,
+    "CONNECT": _handle_connect,
+    "PUT": _handle_passthrough,
+    "GET": _handle_passthrough,
+    "DEL": _handle_passthrough,
+    "COMPACT": _handle_passthrough,
+    "HELP": _handle_help,
+}
+
+async def run_cli(host, port):
+    # input() blocks, so it runs on an executor thread while the event loop
+    # keeps servicing the connection
+    loop = asyncio.get_running_loop()
+    with contextlib.suppress(NotImplementedError):
+        # Ctrl+C must not kill the prompt thread (not supported on Windows)
+        loop.add_signal_handler(signal.SIGINT, print, "\nType EXIT to quit.")
+
     print(f"🔌 Connecting to Sider at {host}:{port}...")
-    client = SiderClient(host, port)
+    client = AsyncSiderClient(host, port)
+    await client.connect()
     
+    lines = []
     if client.is_connected():
-        print(f"✅ Connected! (Host: {host})")
+        lines.append(f"✅ Connected! (Host: {host})")
     else:
-        print(f"❌ Could not connect to {host}:{port}. Is the server running?")
-        print("   (You can still type commands, it will try to reconnect)")
+        lines.append(f"❌ Could not connect to {host}:{port}. Is the server running?")
+        lines.append("   (You can still type commands, it will try to reconnect)")
 
-    print("\n--- Sider Shell ---")
-    print("Commands: PUT <k> <v> | GET <k> | DEL <k> | COMPACT | EXIT")
-    print("-------------------")
+    lines.append("\n--- Sider Shell ---")
+    lines.append("Commands: PUT <k> <v> | GET <k> | DEL <k> | COMPACT | EXIT")
+    lines.append("-------------------")
+    write_lines(lines)
 
     while True:
         try:
             # Show prompt with connection status indicator
             status = "🟢" if client.is_connected() else "🔴"
-            user_input = input(f"{status} sider> ").strip()
+            user_input = (await loop.run_in_executor(None, input, f"{status} sider> ")).strip()
             
             if not user_input:
                 continue
 
             parts = user_input.split()
-            cmd = parts[0].upper()
-
-            if cmd == "EXIT" or cmd == "QUIT":
-                print("Bye!")
+            handler = HANDLERS.get(parts[0].upper(), _handle_unknown)
+            next_client = await handler(client, parts, user_input)
+            if next_client is None:
                 break
-            
-            elif cmd == "CONNECT":
-                # Feature to switch servers inside the CLI
-                if len(parts) < 2:
-                    print("Usage: CONNECT <host> [port]")
-                    continue
-                new_host = parts[1]
-                new_port = int(parts[2]) if len(parts) > 2 else 4000
-                client.close()
-                client = SiderClient(new_host, new_port)
-                if client.is_connected():
-                    print(f"✅ Switched to {new_host}:{new_port}")
-                else:
-                    print(f"❌ Could not reach {new_host}:{new_port}")
-
-            elif cmd in ["PUT", "GET", "DEL", "COMPACT"]:
-                # Pass raw command string directly to the helper
-                # This handles the logic for us
-                resp = client._send_command(user_input)
-                
-                # Pretty print errors
-                if resp.startswith("Error"):
-                    print(f"⚠️  {resp}")
-                else:
-                    print(resp)
-            
-            elif cmd == "HELP":
-                print("  PUT <key> <value>  : Save data")
-                print("  GET <key>          : Read data")
-                print("  DEL <key>          : Delete data")
-                print("  COMPACT            : Trigger disk compaction")
-                print("  CONNECT <host>     : Switch server")
-                print("  EXIT               : Quit")
-
-            else:
-                print(f"Unknown command: {cmd}")
+            client = next_client
 
         except KeyboardInterrupt:
             print("\nType EXIT to quit.")
+        except EOFError:
+            # stdin closed (e.g. piped input ran out)
+            break
         except Exception as e:
             print(f"Error processing command: {e}")
 
+    await client.close()
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Sider Database Client")
     # Default to the Azure VM IP
@@ -160,4 +1201,4 @@ if __name__ == "__main__":
     parser.add_argument("--port", type=int, default=4000, help="Server port")
     
     args = parser.parse_args()
-    run_cli(args.host, args.port)
\ No newline at end of file
+    asyncio.run(run_cli(args.host, args.port))
\ No newline at end of file